@@ -22,11 +22,24 @@ class Assistant:
         self.ref: ref.Ref = referrer
         self.start_datetime: dt.datetime = start_datetime
 
+        # one session for every image download, so connections are kept alive between responses
+        self._session: aiohttp.ClientSession = None
+
         self._register()
 
     def _register(self):
         self.bus.register(conductor_events.CompletionRequest, self._trigger_completion)
 
+    def _get_session(self) -> aiohttp.ClientSession:
+        # created lazily, a session has to be opened inside the running loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
     @staticmethod
     async def call_openai(sync_func, *args, **kwargs):
         '''
@@ -82,6 +95,9 @@ class Assistant:
             messages.append(msg)
 
         request['safety_identifier'] = str(hash(chat_id))
+        if model_provider == 'openai':
+            # the system prompts lead every request, so turns from the same chat share a cacheable prefix
+            request['prompt_cache_key'] = request['safety_identifier']
 
         try:
             # start typing simulation
@@ -178,28 +194,28 @@ class Assistant:
         Returns None if the download fails.
         '''
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(image_url, timeout=30) as response:
+            session = self._get_session()
+            async with session.get(image_url, timeout=30) as response:
 
-                    if response.status == 200:
-                        image_bytes: bytes = await response.read()
-                        incomplete_wrapper.image_bytes = image_bytes
+                if response.status == 200:
+                    image_bytes: bytes = await response.read()
+                    incomplete_wrapper.image_bytes = image_bytes
 
-                        def sync_process(img_bytes):
-                            with Image.open(BytesIO(img_bytes)) as img:
-                                width, height = img.size
-                            return width, height
+                    def sync_process(img_bytes):
+                        with Image.open(BytesIO(img_bytes)) as img:
+                            width, height = img.size
+                        return width, height
 
-                        width, height = await asyncio.to_thread(sync_process, image_bytes)
-                        incomplete_wrapper.x = width
-                        incomplete_wrapper.y = height
+                    width, height = await asyncio.to_thread(sync_process, image_bytes)
+                    incomplete_wrapper.x = width
+                    incomplete_wrapper.y = height
 
-                        return incomplete_wrapper
+                    return incomplete_wrapper
 
-                    else:
-                        issue = system_events.ErrorEvent(error='Error downloading an image.', e=None, tb=None, event_id=parent_event.event_id, chat_id=self.chat_id)
-                        await self.bus.emit(issue)
-                    
+                else:
+                    issue = system_events.ErrorEvent(error='Error downloading an image.', e=None, tb=None, event_id=parent_event.event_id, chat_id=self.chat_id)
+                    await self.bus.emit(issue)
+                
         except Exception as e:
             _, _, tb = sys.exc_info()
             issue = system_events.ErrorEvent(error='Error downloading an image.', e=e, tb=tb, event_id=parent_event.event_id, chat_id=self.chat_id)
@@ -27,11 +27,28 @@ class Conductor:
         self._media_group_tasks: Dict[str, asyncio.Task] = {}
         self._media_group_timeout = 1.0  # 1 second timeout for album completion
 
+        # Completion debouncing - a burst of messages in one chat gets a single reply
+        self._completion_requests: Dict[str, conductor_events.CompletionRequest] = {}
+        self._completion_timers: Dict[str, asyncio.TimerHandle] = {}
+        self._completion_deadlines: Dict[str, float] = {}
+        self._completion_delay = 0.4  # wait this long for the next message
+        self._completion_max_delay = 1.2  # but never longer than this since the first one
+
         self._register()
 
     def _register(self):
         self.bus.register(mibo_events.NewMessageArrived, self._capture_message)
 
+    async def close(self):
+        '''
+        Cancel the pending completion timers, so none of them fires against a bus that is shutting down.
+        '''
+        for timer in self._completion_timers.values():
+            timer.cancel()
+        self._completion_timers.clear()
+        self._completion_deadlines.clear()
+        self._completion_requests.clear()
+
     async def _capture_message(self, event: mibo_events.NewMessageArrived):
         '''
         Listens to new messages sent to chats and processes them into Wrappers.
@@ -395,7 +412,31 @@ class Conductor:
                 special_fields=special_fields, typing=typing_func, 
                 user=user_wrapper
             )
-            await self.bus.emit(new_message_event)
+            self._schedule_completion(chat_id, new_message_event)
+
+    def _schedule_completion(self, chat_id: str, request_event: conductor_events.CompletionRequest):
+        '''
+        Debounce completion requests per chat. Only the latest request of a burst is sent;
+        the window it carries already holds every message of the burst.
+        '''
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        deadline = self._completion_deadlines.setdefault(chat_id, now + self._completion_max_delay)
+
+        self._completion_requests[chat_id] = request_event
+
+        timer = self._completion_timers.pop(chat_id, None)
+        if timer:
+            timer.cancel()
+        self._completion_timers[chat_id] = loop.call_at(min(now + self._completion_delay, deadline), self._flush_completion, chat_id)
+
+    def _flush_completion(self, chat_id: str):
+        self._completion_timers.pop(chat_id, None)
+        self._completion_deadlines.pop(chat_id, None)
+
+        request_event = self._completion_requests.pop(chat_id, None)
+        if request_event:
+            self.bus.emit_sync(request_event)
 
     # ---------------------------------- #
 
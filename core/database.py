@@ -31,14 +31,25 @@ class Database:
         self._init_done = False
         self._lock = asyncio.Lock()  # Add lock to prevent race conditions
 
+    async def _connect(self) -> aiosqlite.Connection:
+        '''
+        Open the shared connection and tune it once for the life of the process.
+        '''
+        conn = await aiosqlite.connect(self.db_path)
+        await conn.execute('PRAGMA foreign_keys = ON')
+        # WAL lets the short-lived sqlite3 connections read while this one writes
+        await conn.execute('PRAGMA journal_mode = WAL')
+        await conn.execute('PRAGMA synchronous = NORMAL')
+        await conn.execute('PRAGMA cache_size = -64000')
+        conn.row_factory = aiosqlite.Row
+        return conn
+
     async def initialize(self):
         '''
         Connect to the database and create tables if they don't exist
         '''
         try:
-            self.conn = await aiosqlite.connect(self.db_path)
-            await self.conn.execute('PRAGMA foreign_keys = ON')
-            self.conn.row_factory = aiosqlite.Row
+            self.conn = await self._connect()
 
             self._register()
 
@@ -52,9 +63,7 @@ class Database:
                 # if the initial connection setup always succeeds or raises. 
                 # it's here for safety??
                 if not self.conn:
-                    self.conn = await aiosqlite.connect(self.db_path)
-                    await self.conn.execute('PRAGMA foreign_keys = ON')
-                    self.conn.row_factory = aiosqlite.Row
+                    self.conn = await self._connect()
 
                 cursor = await self.conn.cursor()
                 try:
@@ -69,6 +78,9 @@ class Database:
         Synchronous version of initialize for use outside async contexts.
         Connects to the database and creates tables if they don't exist.
         '''
+        # registered first, so the listeners are in place before the bus is sealed even if table creation fails
+        self._register()
+
         try:
             # Use a local synchronous connection for table creation
             conn = sqlite3.connect(self.db_path)
@@ -83,8 +95,6 @@ class Database:
             
             self._init_done = True
         
-            self._register()
-        
         except Exception as e:
             _, _, tb = sys.exc_info()
             self.bus.emit_sync(system_events.ErrorEvent(error='The database somehow failed to initialize.', e=e, tb=tb))
@@ -277,7 +287,7 @@ class Database:
                 )
                 await self.conn.commit()
 
-    async def get_window(self, chat_id: str, max_tokens: int = 700, tokenizer = tokenizers.Tokenizer.gpt) -> window.Window:
+    async def get_window(self, chat_id: str, max_tokens: int = 700, tokenizer = tokenizers.Tokenizer.gpt_batch) -> window.Window:
         '''
         Get a chat window, inserting messages up to max_tokens.
         '''
@@ -299,41 +309,48 @@ class Database:
             return wdw
 
 
-    async def _insert_wrapper(self, content: wrapper.Wrapper) -> str:
+    async def _insert_wrappers(self, contents: List[wrapper.Wrapper]) -> List[str]:
         '''
-        Inserts a wrapper linked to an existing chat.
+        Inserts wrappers linked to an existing chat in a single transaction.
         Does so in a way that doesn't need any future changes.
+        Parent rows are inserted one at a time to get their sql_id, child rows are batched per table.
         '''
-        parent_dict = content.to_parent_dict()
-        parent_fields = list(parent_dict.keys())
-        parent_values = list(parent_dict.values())
+        if not contents:
+            return []
 
+        parent_fields = wrapper.Wrapper.PARENT_COLUMNS
         parent_sql = f'INSERT INTO wrappers ({", ".join(parent_fields)}) VALUES ({", ".join(["?"]*len(parent_fields))})'
 
-        # Surely, all english words that mean multiple are just the word with 's' at the end 
-        child_table = f"{content.type}s"
-
-        child_dict = content.to_child_dict()
-        child_fields = list(child_dict.keys())
-        child_values = list(child_dict.values())
-
-        child_sql = f'INSERT INTO {child_table} (sql_id, {", ".join(child_fields)}) VALUES (?, {", ".join(["?"]*len(child_fields))})'
+        # child table -> (insert sql, rows)
+        child_batches: Dict[str, Tuple[str, List[Tuple]]] = {}
 
         async with self._lock:
             async with self.conn.cursor() as cursor:
                 await cursor.execute('BEGIN')
                 try:
-                    await cursor.execute(parent_sql, parent_values)
-                    sql_id = cursor.lastrowid
+                    for content in contents:
+                        await cursor.execute(parent_sql, content.to_parent_row())
+                        sql_id = cursor.lastrowid
+
+                        # Surely, all english words that mean multiple are just the word with 's' at the end 
+                        child_table = f"{content.type}s"
 
-                    await cursor.execute(child_sql, [sql_id] + child_values)
+                        if child_table not in child_batches:
+                            child_fields = content.CHILD_COLUMNS
+                            child_sql = f'INSERT INTO {child_table} (sql_id, {", ".join(child_fields)}) VALUES (?, {", ".join(["?"]*len(child_fields))})'
+                            child_batches[child_table] = (child_sql, [])
+
+                        child_batches[child_table][1].append((sql_id,) + content.to_child_row())
+
+                    for child_sql, child_rows in child_batches.values():
+                        await cursor.executemany(child_sql, child_rows)
 
                     await self.conn.commit()
                 except Exception:
                     await self.conn.rollback()
                     raise
 
-        return content.id
+        return [content.id for content in contents]
     
     async def _add_message(self, event: ref_events.NewMessage):
         '''
@@ -352,10 +369,20 @@ class Database:
                         filepath = await self._save_image(w)
                         w.image_path = filepath
 
-            for w in wrappers:
-                if isinstance(w, wrapper.Wrapper):
+            contents = [w for w in wrappers if isinstance(w, wrapper.Wrapper)]
+
+            # Tokenize all text with a single tokenizer call, the other wrappers only do arithmetic
+            text_wrappers = [w for w in contents if isinstance(w, wrapper.MessageWrapper)]
+            if text_wrappers:
+                token_counts = await asyncio.to_thread(tokenizers.Tokenizer.gpt_batch, [w.message for w in text_wrappers])
+                for text_wrapper, tokens in zip(text_wrappers, token_counts):
+                    text_wrapper.tokens = tokens
+
+            for w in contents:
+                if not isinstance(w, wrapper.MessageWrapper):
                     w.tokens = w.calculate_tokens()
-                    await self._insert_wrapper(w)
+
+            await self._insert_wrappers(contents)
 
         except Exception as e:
             _, _, tb = sys.exc_info()
@@ -449,8 +476,6 @@ class Database:
 
     @staticmethod
     def _populate_defaults():
-        import json
-        
         model_data = {
             "model_provider": "openai",
             "temperature": 0.95,
@@ -602,7 +627,7 @@ class Database:
         except Exception as e:
             await self.conn.rollback() # Consider rollback on the main connection
             _, _, tb = sys.exc_info()
-            self.bus.emit(system_events.ErrorEvent(error='Failed to create database tables.', e=e, tb=tb))
+            await self.bus.emit(system_events.ErrorEvent(error='Failed to create database tables.', e=e, tb=tb))
 
     def _create_tables_sync(self, cursor): # Accepts cursor
         '''
@@ -700,7 +725,7 @@ class Database:
     async def _get_message_wrappers(self, chat_id: str, max_tokens: int, tokenizer) -> List[wrapper.MessageWrapper]:
         '''
         Fetch message wrappers incrementally (newest first) for a given chat_id,
-        tokenize them using `tokenizer`, and stop once `max_tokens` is reached.
+        tokenize them using `tokenizer` (a batch tokenizer, list of texts to list of counts), and stop once `max_tokens` is reached.
         Returns messages oldest-to-newest.
         '''
         messages: List[wrapper.Wrapper] = []
@@ -762,7 +787,7 @@ class Database:
                         child_rows = await cursor.fetchall()
                         tables[wrapper_type] = {child_row["sql_id"]: dict(child_row) for child_row in child_rows}
 
-                stop = False
+                wrapper_instances: List[wrapper.Wrapper] = []
                 for parent_row in parent_rows:
                     wrapper_type = parent_row["wrapper_type"]
                     sql_id = parent_row["sql_id"]
@@ -788,15 +813,18 @@ class Database:
                             parsed_datetime = dt.datetime.now(dt.timezone.utc)
                     parent_dict["datetime"] = parsed_datetime
 
-                    wrapper_instance = wrapper_class.from_db_row(parent_dict, child_row)
+                    wrapper_instances.append(wrapper_class.from_db_row(parent_dict, child_row))
 
-                    if isinstance(wrapper_instance, wrapper.ImageWrapper) and wrapper_instance.image_path:
-                        wrapper_instance.image_bytes = await self._load_image(wrapper_instance.image_path)
+                # Tokenize all text in the batch with a single tokenizer call
+                text_wrappers = [w for w in wrapper_instances if isinstance(w, wrapper.MessageWrapper)]
+                token_counts = await asyncio.to_thread(tokenizer, [w.message for w in text_wrappers])
+                for text_wrapper, tokens in zip(text_wrappers, token_counts):
+                    text_wrapper.tokens = tokens
 
-                    # Tokenize / compute tokens
+                stop = False
+                for wrapper_instance in wrapper_instances:
                     if isinstance(wrapper_instance, wrapper.MessageWrapper):
-                        tokens = tokenizer(wrapper_instance.message)
-                        wrapper_instance.tokens = tokens
+                        tokens = wrapper_instance.tokens
                     elif isinstance(wrapper_instance, wrapper.ImageWrapper):
                         tokens = wrapper_instance.calculate_tokens()
                         wrapper_instance.tokens = tokens
@@ -807,6 +835,10 @@ class Database:
                         stop = True
                         break
 
+                    # only read images from disk once they made it into the window
+                    if isinstance(wrapper_instance, wrapper.ImageWrapper) and wrapper_instance.image_path:
+                        wrapper_instance.image_bytes = await self._load_image(wrapper_instance.image_path)
+
                     running_total += tokens
                     messages.append(wrapper_instance)
 
@@ -1,6 +1,7 @@
 import secrets
 import string
-from typing import Dict, List, Callable, Tuple
+from typing import Dict, List, Callable, Tuple, OrderedDict
+import collections
 import asyncio
 import time
 
@@ -200,7 +201,7 @@ class Ref:
         self.db: database.Database = database.Database(self.bus, db_path, self.start_datetime)
 
         self.chats: Dict[str, wrapper.ChatWrapper] = {}
-        self.windows: Dict[str, window.Window] = {}
+        self.windows: OrderedDict[str, window.Window] = collections.OrderedDict() # kept in lru order
         self.users: Dict[str, wrapper.UserWrapper] = {}
 
         self.assistants: Dict[str, AssistantReference] = {}
@@ -256,6 +257,12 @@ class Ref:
                 wdw = window.Window(chat_id, self.start_datetime)
             self.windows[chat_id] = wdw
 
+            # evicted windows are simply reloaded from the database next time
+            while len(self.windows) > variables.Variables.MAX_WINDOWS:
+                self.windows.popitem(last=False)
+        else:
+            self.windows.move_to_end(chat_id)
+
         wdw.set_max_tokens(max_tokens)
         return wdw
     
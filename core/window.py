@@ -1,12 +1,31 @@
 import datetime as dt
 import asyncio
-import re
+
+try:
+    import re2 as re # linear-time matching for model generated text
+except ImportError:
+    import re
 
 from typing import List, Dict, Deque
 from collections import deque
 
 from core import wrapper
 
+# Pattern for a single tag like <key:value>, allowing for whitespace between tags
+_TAG_PATTERN = re.compile(r"\s*<([A-Za-z0-9]+):([^>]*)>")
+
+# tag keys are stored lowercased, except for these
+_TAG_KEYS = {"replyto": "replyTo"}
+
+# how far back a message may be dated and still be treated as arriving in order, in microseconds
+_ORDER_SLACK = 5_000_000
+
+def _timestamp(datetime: dt.datetime) -> int:
+    '''
+    POSIX timestamp in microseconds, compares as a plain int.
+    '''
+    return int(datetime.timestamp() * 1_000_000)
+
 class Window():
     def __init__(self, chat_id: str, start_datetime: dt.datetime):
         self.chat_id: str = chat_id
@@ -16,11 +35,15 @@ class Window():
         self.max_tokens: int = 700
 
         self._lock = asyncio.Lock()
-        self._stale_buffer: Deque[wrapper.Wrapper] = deque()
         
         self.messages: Deque[wrapper.Wrapper] = deque()
         self.ready: bool = False
 
+        # hot fields of self.messages kept in parallel so scans don't touch the wrappers.
+        # ids are not mirrored, they are rewritten in place once telegram assigns the real ones
+        self._timestamps: Deque[int] = deque()
+        self._tokens: Deque[int] = deque()
+
     def set_max_tokens(self, max_tokens: int):
         self.max_tokens = max_tokens
 
@@ -31,27 +54,52 @@ class Window():
         return self.messages[idx]
     
     def __delitem__(self, idx):
+        self.tokens -= self._tokens[idx]
+
         del self.messages[idx]
+        del self._timestamps[idx]
+        del self._tokens[idx]
         
     def __contains__(self, message: wrapper.Wrapper) -> bool:
         '''
         Enables the 'in' keyword to check if the window contains a message with the same id and type.
         '''
-        return any((msg.id == message.id and msg.type == message.type) for msg in self.messages)
+        return self.contains(message)
 
     def contains(self, message: wrapper.Wrapper) -> bool:
         '''
         Checks if the window contains a message with the same id.
         '''
-        return any((msg.id == message.id and msg.type == message.type) for msg in self.messages)
+        message_id = message.id
+        message_type = message.type
+
+        for msg in self.messages:
+            if msg.id == message_id and msg.type == message_type:
+                return True
+        return False
+
+    def _insert(self, idx: int, message: wrapper.Wrapper, timestamp: int, tokens: int) -> None:
+        self.messages.insert(idx, message)
+        self._timestamps.insert(idx, timestamp)
+        self._tokens.insert(idx, tokens)
+
+    def _popleft(self) -> int:
+        self.messages.popleft()
+        self._timestamps.popleft()
+        return self._tokens.popleft()
+
+    def _reset(self) -> None:
+        self.messages.clear()
+        self._timestamps.clear()
+        self._tokens.clear()
+        self.tokens = 0
 
     async def override(self, message: wrapper.Wrapper) -> None:
         '''
         Clears the windows and adds the message.
         '''
         async with self._lock:
-            self.messages.clear()
-            self.tokens = 0
+            self._reset()
             self.ready = True
             print(f'Window {message.chat_id} is ready, starting live processing.')
 
@@ -73,13 +121,10 @@ class Window():
         message_text = message.message
         message_metadata = {}
 
-        # Pattern for a single tag like <key:value>, allowing for whitespace between tags
-        tag_pattern = re.compile(r"\s*<([A-Za-z0-9]+):([^>]*)>")
-
         text_index = 0
         # Consume tags from the very start
         while True:
-            tag_match = tag_pattern.match(message_text, text_index)
+            tag_match = _TAG_PATTERN.match(message_text, text_index)
             if not tag_match:
                 break
 
@@ -87,16 +132,7 @@ class Window():
             tag_value = tag_match.group(2) if tag_match.group(2) != "" else None
 
             lowercase_key = tag_key.lower()
-            if lowercase_key == "id":
-                message_metadata["id"] = tag_value
-            elif lowercase_key == "by":
-                message_metadata["by"] = tag_value
-            elif lowercase_key == "replyto":
-                message_metadata["replyTo"] = tag_value
-            elif lowercase_key == "quote":
-                message_metadata["quote"] = tag_value
-            else:
-                message_metadata[lowercase_key] = tag_value
+            message_metadata[_TAG_KEYS.get(lowercase_key, lowercase_key)] = tag_value
 
             text_index = tag_match.end()
 
@@ -170,54 +206,54 @@ class Window():
         
         message = await self._extract_metadata(message, **kwargs)
 
-        message_tokens = message.tokens or message.calculate_tokens()
+        # tokenizing is CPU bound, keep it off the event loop
+        message_tokens = message.tokens or await asyncio.to_thread(message.calculate_tokens)
+        message_timestamp = _timestamp(message.datetime)
         inserted = False
 
         # assume messages arrive mostly in order
         try:
             if not self.messages or int(message.id) >= int(self.messages[-1].id):
-                self.messages.append(message)
+                self._insert(len(self.messages), message, message_timestamp, message_tokens)
                 inserted = True
         except ValueError:
-            if not self.messages or (message.datetime + dt.timedelta(seconds=5) >= self.messages[-1].datetime):
-                self.messages.append(message)
+            if not self._timestamps or (message_timestamp + _ORDER_SLACK >= self._timestamps[-1]):
+                self._insert(len(self.messages), message, message_timestamp, message_tokens)
                 inserted = True
         
         if not inserted:
-            for i in range(len(self.messages) - 1, -1, -1):
-                if message.datetime >= self.messages[i].datetime:
-                    self.messages.insert(i + 1, message)
+            # walk backwards without indexing into the middle of the deque
+            for i, timestamp in zip(range(len(self._timestamps) - 1, -1, -1), reversed(self._timestamps)):
+                if message_timestamp >= timestamp:
+                    self._insert(i + 1, message, message_timestamp, message_tokens)
                     inserted = True
                     break
 
             if not inserted:
-                self.messages.appendleft(message)
+                self._insert(0, message, message_timestamp, message_tokens)
 
         self.tokens += message_tokens
         await self._trim_excess_tokens(self.max_tokens)
 
     async def _trim_excess_tokens(self, max_tokens: int) -> None:
         while self.tokens > max_tokens and self.messages:
-            oldest_msg = self.messages.popleft()
-            oldest_tokens = oldest_msg.tokens
-            self.tokens -= oldest_tokens
+            self.tokens -= self._popleft()
 
     async def remove_messages(self, message_ids: List[str]):
         '''
         Removes messages with the given IDs from the window.
         '''
         async with self._lock:
-            messages_to_keep = deque()
-            tokens_to_deduct = 0
-
-            for msg in self.messages:
-                if msg.id in message_ids:
-                    tokens_to_deduct += msg.tokens
-                else:
-                    messages_to_keep.append(msg)
+            kept = [(msg, msg_timestamp, msg_tokens)
+                    for msg, msg_timestamp, msg_tokens in zip(self.messages, self._timestamps, self._tokens)
+                    if msg.id not in message_ids]
 
-            self.messages = messages_to_keep
-            self.tokens -= tokens_to_deduct
+            self._reset()
+            for msg, msg_timestamp, msg_tokens in kept:
+                self.messages.append(msg)
+                self._timestamps.append(msg_timestamp)
+                self._tokens.append(msg_tokens)
+                self.tokens += msg_tokens
 
         return self
 
@@ -226,8 +262,7 @@ class Window():
         Clears the window.
         '''
         async with self._lock:
-            self.messages.clear()
-            self.tokens = 0
+            self._reset()
             self.ready = True
 
         return self
@@ -292,7 +327,8 @@ class Window():
                         grouped_content[group_id]["content"].append({"type": "text", "text": text})
 
             elif isinstance(message, wrapper.ImageWrapper) and image_support:
-                base64 = message.get_base64()
+                # the first encode of a large image takes milliseconds, so keep it off the loop; later ones are cached
+                base64 = message.get_base64() if message.base64_ready else await asyncio.to_thread(message.get_base64)
                 detail = message.detail
 
                 if base64:
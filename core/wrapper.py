@@ -1,64 +1,70 @@
-import base64
-import tiktoken
 import re
+import sys
+import types
+
+try:
+    import pybase64 as base64 # SIMD accelerated, same interface
+except ImportError:
+    import base64
 
 import datetime as dt
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+from services import tokenizers, variables
 
-from services import variables
+_UTC = dt.timezone.utc
+_MIN_DATETIME = dt.datetime.min.replace(tzinfo=_UTC)
 
-WRAPPER_REGISTRY = {}
+_WRAPPER_REGISTRY = {}
+WRAPPER_REGISTRY = types.MappingProxyType(_WRAPPER_REGISTRY) # read-only view, only register_wrapper adds to it
 def register_wrapper(cls):
     type_name = cls.__name__.replace('Wrapper', '').lower() # type is the class name without 'Wrapper'
     cls.type = type_name # assign type to the class
-    WRAPPER_REGISTRY[type_name] = cls
+    _WRAPPER_REGISTRY[type_name] = cls
     return cls
 
 @register_wrapper
 class Wrapper():
+    # type is a class attribute assigned by register_wrapper, so it is not a slot
+    __slots__ = ('id', 'chat_id', 'tokens', 'role', 'user', 'reply_id', 'datetime')
+
+    # column order of to_parent_row, matches the wrappers table
+    PARENT_COLUMNS = ('telegram_id', 'chat_id', 'wrapper_type', 'datetime', 'role', 'user', 'reply_id')
+    CHILD_COLUMNS: Tuple[str, ...] = ()
+
     def __init__(self, id: str, chat_id: str, datetime: dt.datetime = None, **kwargs):
         self.id: str = str(id)
-        self.chat_id: str = str(chat_id)
-        self.type = self.__class__.type # assign type to the instance
+        # chat ids, roles and usernames repeat across the whole window, share one copy of each
+        self.chat_id: str = sys.intern(str(chat_id))
 
         self.tokens: int = kwargs.get('tokens', 0)
 
-        self.role: str = kwargs.get('role', 'assistant')
+        self.role: str = sys.intern(kwargs.get('role', 'assistant'))
         self.user: str = kwargs.get('user', variables.Variables.USERNAME)
+        if isinstance(self.user, str):
+            self.user = sys.intern(self.user)
 
         self.reply_id: str = kwargs.get('reply_id', None)
 
-        try:
-            self.datetime: dt.datetime = datetime.astimezone(dt.timezone.utc)
-        except Exception:
-            # if no datetime is provided, assign the oldest possible datetime so ready checks are failed
-            self.start_datetime: dt.datetime = dt.datetime.min.replace(tzinfo=dt.timezone.utc)
+        # if no datetime is provided, assign the oldest possible datetime so ready checks are failed
+        self.datetime: dt.datetime = datetime.astimezone(_UTC) if isinstance(datetime, dt.datetime) else _MIN_DATETIME
 
-    def to_parent_dict(self) -> Dict[str, Any]:
+    def to_parent_row(self) -> Tuple:
         '''
-        Common meta row for the parent wrappers table
+        Common meta row for the parent wrappers table, in PARENT_COLUMNS order for direct use as sql parameters
         '''
-        return {
-            'telegram_id': self.id,
-            'chat_id': self.chat_id,
-            'wrapper_type': self.type,
-            'datetime': self.datetime,
-            'role': self.role,
-            'user': self.user,
-            'reply_id': self.reply_id,
-        }
+        return (self.id, self.chat_id, self.type, self.datetime, self.role, self.user, self.reply_id)
     
     @classmethod
     def from_db_row(cls, parent_row, child_row):
-        combined_data = {**parent_row, **child_row}
-        
+        # parent and child columns don't overlap, so read each row directly instead of merging them
         constructor_params = {
-            'id': combined_data.get('telegram_id'),
-            'chat_id': combined_data.get('chat_id'),
-            'datetime': combined_data.get('datetime'),
-            'role': combined_data.get('role', 'assistant'),
-            'user': combined_data.get('user', variables.Variables.USERNAME),
-            'reply_id': combined_data.get('reply_id', None),
+            'id': parent_row.get('telegram_id'),
+            'chat_id': parent_row.get('chat_id'),
+            'datetime': parent_row.get('datetime'),
+            'role': parent_row.get('role', 'assistant'),
+            'user': parent_row.get('user', variables.Variables.USERNAME),
+            'reply_id': parent_row.get('reply_id', None),
         }
     
         constructor_params.update(child_row)
@@ -66,8 +72,8 @@ class Wrapper():
         
         return inst
 
-    def to_child_dict(self) -> Dict[str, Any]:
-        raise NotImplementedError("Subclasses should implement this method to return child-specific data.")
+    def to_child_row(self) -> Tuple:
+        raise NotImplementedError("Subclasses should implement this method to return child-specific data in CHILD_COLUMNS order.")
     
     @classmethod
     def get_child_fields(cls):
@@ -78,6 +84,10 @@ class Wrapper():
 
 @register_wrapper
 class MessageWrapper(Wrapper):
+    __slots__ = ('_message', '_token_count', 'ping', 'reactions', 'quote', 'think', 'group_id', 'metadata')
+
+    CHILD_COLUMNS = ('message', 'quote', 'think')
+
     def __init__(self, id: str, chat_id: str, message: str = '', ping: bool = True, **kwargs):
         super().__init__(id, chat_id, **kwargs)
 
@@ -92,19 +102,27 @@ class MessageWrapper(Wrapper):
         
         self.group_id: str = kwargs.get('group_id', id)
 
-    def to_child_dict(self):
-        return {
-            'message': self.message,
-            'quote': self.quote,
-            'think': self.think,
-        }
+        self.metadata: Dict[str, Any] = {}
+
+    def to_child_row(self):
+        return (self.message, self.quote, self.think)
     
     @classmethod
     def get_child_fields(cls):
-        return ['message', 'quote', 'think']
+        return list(cls.CHILD_COLUMNS)
+
+    @property
+    def message(self) -> str:
+        return self._message
+
+    @message.setter
+    def message(self, value: str):
+        # the token count depends on the message, drop it whenever the message changes
+        self._message = value
+        self._token_count: Optional[Tuple[str, int]] = None
 
     def __str__(self):
-        return f'{self.message}'
+        return self._message
 
     @staticmethod
     def _remove_prefixes(text: str, prefixes: List[str]) -> str:
@@ -125,12 +143,17 @@ class MessageWrapper(Wrapper):
         return text2
     
     def calculate_tokens(self, model='gpt-4o'):
-        encoding = tiktoken.encoding_for_model(model)
-        tokens = len(encoding.encode(str(self)))
-        return tokens
+        # (model, count) of the last calculation
+        if self._token_count is None or self._token_count[0] != model:
+            self._token_count = (model, tokenizers.Tokenizer.gpt(str(self), model))
+        return self._token_count[1]
 
 @register_wrapper
 class ImageWrapper(Wrapper):
+    __slots__ = ('x', 'y', '_image_bytes', '_base64', 'image_path', 'image_summary', 'tokens_precalculated', 'summary_tokens', 'detail', 'group_id', 'ping')
+
+    CHILD_COLUMNS = ('x', 'y', 'image_path', 'image_summary')
+
     def __init__(self, id: str, chat_id: str, x: int, y: int, image_bytes: Optional[bytes] = None, image_path: Optional[str] = None, **kwargs):
         super().__init__(id, chat_id, **kwargs)
         self.x = x or 0
@@ -149,6 +172,8 @@ class ImageWrapper(Wrapper):
         # For linking to parent message/album
         self.group_id: str = kwargs.get('group_id', id)
 
+        self.ping: bool = kwargs.get('ping', False)
+
     def calculate_tokens(self):
         if self.detail == 'low':
             return 85
@@ -159,33 +184,47 @@ class ImageWrapper(Wrapper):
         elif self.image_bytes is None and self.summary_tokens:
             return self.summary_tokens
         
-        else:
-            width = (self.x + 512 -1) // 512 # round up by adding 511
-            height = (self.y + 512 -1) // 512
-
-            return 85 + 170 * (height + width)
+        # 170 tokens per started 512px tile on each axis, -(-a // b) is a ceiling division
+        return 85 + 170 * (-(-self.x // 512) + -(-self.y // 512))
+
+    @property
+    def image_bytes(self) -> bytes:
+        return self._image_bytes
+
+    @image_bytes.setter
+    def image_bytes(self, value: bytes):
+        # images are downloaded or loaded from disk after creation, drop the encoded copy when that happens
+        self._image_bytes = value
+        self._base64 = None
     
     def get_base64(self) -> str:
         '''
         Get the base64 of the image bytes.
+        Encoded once and reused for every request the image is part of.
         '''
-        if not self.image_bytes:
+        if not self._image_bytes:
             return ''
-        return base64.b64encode(self.image_bytes).decode('utf-8')
+        if self._base64 is None:
+            self._base64 = base64.b64encode(self._image_bytes).decode('ascii')
+        return self._base64
+
+    @property
+    def base64_ready(self) -> bool:
+        '''
+        True when get_base64 returns without encoding anything.
+        '''
+        return self._base64 is not None or not self._image_bytes
     
-    def to_child_dict(self):
-        return {
-            'x': self.x,
-            'y': self.y,
-            'image_path': self.image_path,
-            'image_summary': self.image_summary,
-        }
+    def to_child_row(self):
+        return (self.x, self.y, self.image_path, self.image_summary)
     
     @classmethod
     def get_child_fields(cls):
-        return ['x', 'y', 'image_path', 'image_summary']
+        return list(cls.CHILD_COLUMNS)
  
 class UserWrapper():
+    __slots__ = ('id', 'username', 'preferred_name', 'image_generation_limit', 'deep_research_limit', 'utc_offset', 'admin_chats', 'token')
+
     def __init__(self, id: str, **kwargs):
         self.id: str = str(id)
 
@@ -201,6 +240,8 @@ class UserWrapper():
         self.token: str = kwargs.get('token', '')
 
 class ChatWrapper():
+    __slots__ = ('id', 'chat_id', 'chat_name', 'chance', 'assistant_id', 'ai_model_id', 'disabled', 'last_active', 'in_use')
+
     def __init__(self, id: str, **kwargs):
         self.id: str = str(id)
         self.chat_id = self.id
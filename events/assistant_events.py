@@ -3,9 +3,15 @@ from events import event
 from core import wrapper
 
 class CompletionResponse(event.Event):
-    def __init__(self, wrapper_list: List[wrapper.Wrapper], typing, **kwargs):
-        super().__init__('completion_response', wrapper_list=wrapper_list, typing=typing, **kwargs)
+    __slots__ = ('wrapper_list',)
+
+    def __init__(self, wrapper_list: List[wrapper.Wrapper], typing, event_id: str = None, chat_id: str = None):
+        super().__init__('completion_response', event_id, chat_id, typing)
+        self.wrapper_list: List[wrapper.Wrapper] = wrapper_list
 
 class AssistantResponse(event.Event):
-    def __init__(self, messages: List[wrapper.Wrapper], typing, **kwargs):
-        super().__init__('assistant_response', messages=messages, typing=typing, **kwargs)
\ No newline at end of file
+    __slots__ = ('messages',)
+
+    def __init__(self, messages: List[wrapper.Wrapper], typing, event_id: str = None, chat_id: str = None):
+        super().__init__('assistant_response', event_id, chat_id, typing)
+        self.messages: List[wrapper.Wrapper] = messages
\ No newline at end of file
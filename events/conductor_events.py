@@ -4,5 +4,13 @@ from core import window
 from services import prompt_enum
 
 class CompletionRequest(event.Event):
-    def __init__(self, wdw: window.Window, request: Dict, prompts: Dict[prompt_enum.PromptEnum, str], special_fields: Dict, **kwargs):
-        super().__init__('completion_request', wdw=wdw, request=request, prompts=prompts, special_fields=special_fields, **kwargs)
+    __slots__ = ('wdw', 'request', 'prompts', 'special_fields', 'user')
+
+    def __init__(self, wdw: window.Window, request: Dict, prompts: Dict[prompt_enum.PromptEnum, str], special_fields: Dict, 
+                 typing=None, user: object = None, event_id: str = None, chat_id: str = None):
+        super().__init__('completion_request', event_id, chat_id, typing)
+        self.wdw: window.Window = wdw
+        self.request: Dict = request
+        self.prompts: Dict[prompt_enum.PromptEnum, str] = prompts
+        self.special_fields: Dict = special_fields
+        self.user = user
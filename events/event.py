@@ -1,21 +1,31 @@
-import uuid
+import itertools
+
+# event ids only have to be unique within the running process
+_next_event_id = itertools.count(1).__next__
 
 class Event:
-    def __init__(self, name: str, **kwargs):
-        self.event_id = str(uuid.uuid4().hex)
-        self.name = name
-        for key, value in kwargs.items():
-            if key == 'event_id' or key == 'chat_id':
-                value = str(value)
-            setattr(self, key, value)
+    # chat_id and typing ride along on many events, so they live here; subclasses list their own fields
+    __slots__ = ('event_id', 'name', 'chat_id', 'typing')
+
+    def __init__(self, name: str, event_id=None, chat_id=None, typing=None):
+        # ids are compared as strings everywhere, whatever the caller passed in
+        if event_id is None:
+            event_id = str(_next_event_id())
+        elif not isinstance(event_id, str):
+            event_id = str(event_id)
+        if chat_id is not None and not isinstance(chat_id, str):
+            chat_id = str(chat_id)
+
+        self.event_id: str = event_id
+        self.name: str = name
+        self.chat_id: str = chat_id
+        self.typing = typing
 
     def __eq__(self, value):
+        # responses reuse the id of the event they answer, so the name is part of the identity
         if isinstance(value, Event):
-            for attr in vars(self):
-                if not hasattr(value, attr) or getattr(self, attr) != getattr(value, attr):
-                    return False
-            return True
+            return self.event_id == value.event_id and self.name == value.name
         return False
     
     def __hash__(self):
-        return self.event_id
\ No newline at end of file
+        return hash((self.event_id, self.name))
\ No newline at end of file
@@ -1,20 +1,42 @@
 import asyncio
+import logging
+import sys
 from contextlib import suppress
+from types import MappingProxyType
 from typing import List, Type, TypeVar
 
 from events import event as ev
+from events import system_events
 
 ResponseType = TypeVar('ResponseType', bound=ev.Event)
+
+logger = logging.getLogger('mibo.events')
+
+# 3.12+ tasks can run their first step on creation; short handlers then finish without ever being scheduled
+_EAGER_START = sys.version_info >= (3, 12)
     
 class EventBus:
     def __init__(self):
-        self._listeners: dict[type[ev.Event], list] = {}
+        # (handler, is_coroutine) pairs are kept in tuples, rebuilt on (un)registration,
+        # so emit never copies or guards against mutation
+        self._listeners: dict[type[ev.Event], tuple[tuple[object, bool], ...]] = {}
         self._tasks: set[asyncio.Task] = set() # track auto‑spawned tasks
+        self._loop: asyncio.AbstractEventLoop | None = None # captured on first emit
+        # the set is what keeps pending tasks alive (the loop only holds weak references), so bind its methods once
+        self._track = self._tasks.add
+        self._untrack = self._tasks.discard
+        self._lookup = self._listeners.get
+        self._sealed = False
 
     def _spawn(self, coroutine):
-        task = asyncio.create_task(coroutine)
-        self._tasks.add(task)
-        task.add_done_callback(self._tasks.discard)
+        if _EAGER_START:
+            task = asyncio.Task(coroutine, loop=self._loop, eager_start=True)
+            if task.done():
+                return task
+        else:
+            task = self._loop.create_task(coroutine)
+        self._track(task)
+        task.add_done_callback(self._untrack)
         return task
     
     async def close(self): 
@@ -23,42 +45,109 @@ class EventBus:
             task.cancel()
         await asyncio.gather(*self._tasks, return_exceptions=True)
 
+    def seal(self) -> None:
+        '''
+        Freeze the listener table once every component has registered.
+        '''
+        self._listeners = MappingProxyType(self._listeners)
+        self._lookup = self._listeners.get
+        self._sealed = True
+
     def register(self, event_cls: type[ev.Event], handler) -> None:
-        self._listeners.setdefault(event_cls, []).append(handler)
+        if self._sealed:
+            raise RuntimeError('Cannot register listeners on a sealed event bus.')
+        entry = (handler, asyncio.iscoroutinefunction(handler))
+        self._listeners[event_cls] = self._listeners.get(event_cls, ()) + (entry,)
 
     def unregister(self, event_cls: type[ev.Event], handler) -> None:
+        if self._sealed:
+            raise RuntimeError('Cannot unregister listeners on a sealed event bus.')
         if event_cls in self._listeners:
-            try:
-                self._listeners[event_cls].remove(handler)
-            except ValueError:
-                pass
-            if not self._listeners[event_cls]:
+            handlers = list(self._listeners[event_cls])
+            for i, (registered, _) in enumerate(handlers):
+                if registered == handler:
+                    del handlers[i]
+                    break
+            if handlers:
+                self._listeners[event_cls] = tuple(handlers)
+            else:
                 del self._listeners[event_cls]
 
     async def emit(self, event: ev.Event) -> ev.Event:
         """
         Fire-and-forget emit.
         """
-        for handler in self._listeners.get(type(event), []):
-            if asyncio.iscoroutinefunction(handler):
-                # schedule and track task
-                self._spawn(handler(event))
-            else:
-                try:
-                    handler(event)
-                except Exception:
-                    # swallow exceptions in sync handlers to avoid breaking emitter
-                    pass
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        self._dispatch(event)
         return event
+
+    def _dispatch(self, event: ev.Event) -> None:
+        handlers = self._lookup(type(event))
+        if not handlers:
+            return
+
+        spawn = self._spawn
+        position = 0
+        # one guard for the whole run; a failing handler is reported and the rest resume after it
+        while True:
+            try:
+                for position in range(position, len(handlers)):
+                    handler, is_coroutine = handlers[position]
+                    if is_coroutine:
+                        # schedule and track task
+                        spawn(handler(event))
+                    else:
+                        handler(event)
+                return
+            except Exception as e:
+                self._report(event, e)
+                position += 1
+
+    def _report(self, event: ev.Event, e: Exception, dispatch=None) -> None:
+        # errors raised by error handlers are dropped, otherwise a broken handler would loop forever
+        if isinstance(event, system_events.ErrorEvent):
+            return
+        (dispatch or self._dispatch)(system_events.ErrorEvent(
+            error=f'A handler for {event.name} failed.', e=e, tb=e.__traceback__
+        ))
     
     def emit_sync(self, event: ev.Event) -> None:
         '''
         Synchronous version of emit that can be called from synchronous contexts.
-        It schedules the async emit to run in the event loop.
+        It hands the dispatch to the bus's event loop, from any thread.
         '''
-        try:
-            loop = asyncio.get_running_loop()
-            self._spawn(self.emit(event))
-        except RuntimeError:
-            # No running event loop
-            asyncio.run_coroutine_threadsafe(self.emit(event), asyncio.get_event_loop())
\ No newline at end of file
+        if type(event) not in self._listeners:
+            return
+
+        loop = self._loop
+        if loop is None:
+            try:
+                loop = self._loop = asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(self._dispatch, event)
+            return
+
+        # no loop to schedule on yet, so only the plain handlers can run
+        self._dispatch_inline(event)
+
+    def _dispatch_inline(self, event: ev.Event) -> None:
+        '''
+        _dispatch for when there is no event loop: plain handlers run in place, failures are reported the same way,
+        and coroutine handlers are logged as skipped since nothing could ever await them.
+        '''
+        for handler, is_coroutine in self._lookup(type(event), ()):
+            if is_coroutine:
+                logger.warning(
+                    'No event loop to run %s for %s, the handler was skipped.',
+                    getattr(handler, '__qualname__', handler), event.name,
+                    exc_info=event.e if isinstance(event, system_events.ErrorEvent) else None,
+                )
+                continue
+            try:
+                handler(event)
+            except Exception as e:
+                self._report(event, e, self._dispatch_inline)
\ No newline at end of file
@@ -5,9 +5,18 @@ from telegram.ext import CallbackContext
 from events import event
 
 class NewMessageArrived(event.Event):
-    def __init__(self, update: Update, context: CallbackContext, typing, **kwargs):
-        super().__init__('new_message_arrived', update=update, context=context, typing=typing, **kwargs)
+    # system is only ever set on messages injected by the bot itself
+    __slots__ = ('update', 'context', 'system')
+
+    def __init__(self, update: Update, context: CallbackContext, typing, event_id: str = None, chat_id: str = None):
+        super().__init__('new_message_arrived', event_id, chat_id, typing)
+        self.update: Update = update
+        self.context: CallbackContext = context
 
 class TelegramIDUpdateRequest(event.Event):
-    def __init__(self, messages: List, wrappers: List, **kwargs):
-        super().__init__('telegram_id_update_request', messages=messages, wrappers=wrappers, **kwargs)
\ No newline at end of file
+    __slots__ = ('messages', 'wrappers')
+
+    def __init__(self, messages: List, wrappers: List, event_id: str = None, chat_id: str = None):
+        super().__init__('telegram_id_update_request', event_id, chat_id)
+        self.messages: List = messages
+        self.wrappers: List = wrappers
\ No newline at end of file
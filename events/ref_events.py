@@ -4,13 +4,23 @@ from events import event
 from core import wrapper
 
 class NewChat(event.Event):
-    def __init__(self, chat: wrapper.ChatWrapper, **kwargs):
-        super().__init__('new_chat', chat=chat, **kwargs)
+    __slots__ = ('chat', 'update')
+
+    def __init__(self, chat: wrapper.ChatWrapper, update: bool = False, event_id: str = None):
+        super().__init__('new_chat', event_id)
+        self.chat: wrapper.ChatWrapper = chat
+        self.update: bool = update
 
 class NewMessage(event.Event):
-    def __init__(self, chat_id: str, wrappers: List[wrapper.MessageWrapper], **kwargs):
-        super().__init__('new_message', chat_id=chat_id, wrappers=wrappers, **kwargs)
+    __slots__ = ('wrappers',)
+
+    def __init__(self, chat_id: str, wrappers: List[wrapper.MessageWrapper], event_id: str = None):
+        super().__init__('new_message', event_id, chat_id)
+        self.wrappers: List[wrapper.MessageWrapper] = wrappers
 
 class NewUser(event.Event):
-    def __init__(self, user: wrapper.UserWrapper, **kwargs):
-        super().__init__('new_user', user=user, **kwargs)
\ No newline at end of file
+    __slots__ = ('user',)
+
+    def __init__(self, user: wrapper.UserWrapper, event_id: str = None):
+        super().__init__('new_user', event_id)
+        self.user: wrapper.UserWrapper = user
\ No newline at end of file
@@ -2,9 +2,17 @@ from typing import Tuple
 from events import event
 
 class ShutdownEvent(event.Event):
-    def __init__(self, **kwargs):
-        super().__init__('shutdown_event', **kwargs)
+    __slots__ = ('sig',)
+
+    def __init__(self, sig=None, event_id: str = None):
+        super().__init__('shutdown_event', event_id)
+        self.sig = sig
 
 class ErrorEvent(event.Event):
-    def __init__(self, error: str, e: Exception, tb: Tuple = None, **kwargs):
-        super().__init__('error', error=error, e=e, tb=tb, **kwargs)
\ No newline at end of file
+    __slots__ = ('error', 'e', 'tb')
+
+    def __init__(self, error: str, e: Exception, tb: Tuple = None, event_id: str = None, chat_id: str = None, typing=None):
+        super().__init__('error', event_id, chat_id, typing)
+        self.error: str = error
+        self.e: Exception = e
+        self.tb: Tuple = tb
\ No newline at end of file
@@ -2,21 +2,52 @@ import asyncio
 import sys
 import signal
 import openai
+import httpx
 import logging
-import traceback
+import logging.handlers
+import queue
 import uuid
 
+try:
+    import uvloop # faster event loop, not available on windows
+except ImportError:
+    uvloop = None
+
 import datetime as dt
 from typing import List, Dict, Type
 from telegram import Update, Chat, ChatMember, InputMediaPhoto, Message, User, ReplyParameters
 from telegram.ext import Application, CallbackContext, CommandHandler, MessageHandler, ChatMemberHandler, filters
 from telegram.constants import ChatAction
+from telegram.helpers import escape_markdown
 
 from events import event_bus, mibo_events, system_events, assistant_events
 from core import assistant, conductor, wrapper, ref
 from services import prompt_enum, variables
 from web import web
 
+logger = logging.getLogger('mibo')
+
+# membership updates the welcome handler cares about
+_GROUP_TYPES = frozenset((Chat.GROUP, Chat.SUPERGROUP))
+_JOINED_STATUSES = frozenset((ChatMember.MEMBER, ChatMember.ADMINISTRATOR))
+_LEFT_STATUSES = frozenset((ChatMember.LEFT, ChatMember.BANNED))
+
+_TYPING_INTERVAL = 4 # telegram shows the indicator for about 5 seconds
+_TYPING_IDLE = 300 # a heartbeat parked this long is dropped, the next reply starts a new one
+
+class _Typing:
+    '''
+    A chat's typing heartbeat. The task stays parked between replies and is toggled through wanted;
+    wake cuts its current wait short.
+    '''
+    __slots__ = ('wanted', 'wake', 'sending', 'task')
+
+    def __init__(self):
+        self.wanted = asyncio.Event()
+        self.wake = asyncio.Event()
+        self.sending = asyncio.Lock() # held while a chat action is in flight
+        self.task: asyncio.Task = None
+
 class Mibo:
     def __init__(self, token: str, db_path: str = 'memory'):
         self.token: str = token
@@ -40,17 +71,24 @@ class Mibo:
         self.local_key : str = variables.Variables.LOCAL_KEY
 
         self.app: Application = None
-        self.typing_tasks: Dict[str, asyncio.Task] = {}
+        # one long-lived typing heartbeat per chat
+        self.typing_tasks: Dict[str, _Typing] = {}
+
+        # caps in-flight bot api calls so bursts across chats don't run into telegram's flood limits
+        self._send_limit = asyncio.Semaphore(20)
 
         self._prepare()
-        print(f'Mibo is alive! It is {self.start_datetime.hour}:{self.start_datetime.minute}:{self.start_datetime.second} UTC.')
+        logger.info(f'Mibo is alive! It is {self.start_datetime:%H:%M:%S} UTC.')
 
     def _prepare(self):
         '''
         Prepare the bot by loading the database, getting the openai client, and setting up signal handlers.
         '''
         self.clients: Dict[str, openai.OpenAI] = {
-            'openai': openai.OpenAI(api_key=self.key),
+            # idle connections are kept past the heartbeat interval, see _keep_warm
+            'openai': openai.OpenAI(api_key=self.key, http_client=openai.DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=1000, max_keepalive_connections=100, keepalive_expiry=90)
+            )),
             'local': openai.OpenAI(api_key=self.local_key, base_url=f"http://{variables.Variables.LOCAL_API_HOST}:{variables.Variables.LOCAL_API_PORT}/v1"),
             'xai': openai.OpenAI(api_key=variables.Variables.XAI_KEY, base_url="https://api.x.ai/v1")
         }
@@ -60,12 +98,14 @@ class Mibo:
         # Register event listeners
         self._register()
 
+        # every component has registered by now
+        self.bus.seal()
+
         self.app = Application.builder().token(self.token).build()
 
         # Create stop event for graceful shutdown
         self.stop_event = asyncio.Event()
 
-        self._register_handlers()
         self._system_signals()
 
     def _register(self):
@@ -79,18 +119,25 @@ class Mibo:
         '''
         Start the bot
         '''
-        # re-initialize for async
-        await self.ref.initialize()
-        
-        await self.app.initialize()
+        # re-initialize for async; the database load and telegram's getMe round-trip don't depend on each other
+        await asyncio.gather(self.ref.initialize(), self.app.initialize())
+
+        # needs the bot's own id, which is only known after initialize
+        self._register_handlers()
+
         await self.app.start()
-        await self.app.updater.start_polling()
+        # long polls keep an idle bot at roughly one getUpdates request a minute
+        await self.app.updater.start_polling(poll_interval=0.0, timeout=50)
 
         self.webapp_task = asyncio.create_task(web.start_webapp(self.ref, self.bus, 6426))
+        # without a key every heartbeat would just fail
+        self.warmup_task = asyncio.create_task(self._keep_warm()) if self.key else None
 
         try:
             await self.stop_event.wait()
         finally:
+            if self.warmup_task:
+                self.warmup_task.cancel()
             self.webapp_task.cancel()
             try:    
                 await self.webapp_task
@@ -104,7 +151,7 @@ class Mibo:
         '''
         Register telegram handlers for commands and messages.
         '''
-        self.app.add_handler(MessageHandler(filters.ALL & (~filters.COMMAND) & (~filters.StatusUpdate.ALL), self._handle_message))
+        self.app.add_handler(MessageHandler(filters.ALL & (~filters.COMMAND) & (~filters.StatusUpdate.ALL) & (~filters.User(user_id=self.app.bot.id)), self._handle_message))
         self.app.add_handler(ChatMemberHandler(self._welcome, ChatMemberHandler.MY_CHAT_MEMBER))
 
         self.app.add_handler(CommandHandler('debug', self._debug))
@@ -128,38 +175,97 @@ class Mibo:
                 loop.add_signal_handler(sig, _on_signal, sig)
         
     async def _shutdown(self, polling_task: asyncio.Task):
-        print('Shutting down...')
+        logger.info('Shutting down...')
+
+        for state in list(self.typing_tasks.values()):
+            state.task.cancel()
+        self.typing_tasks.clear()
 
         await self.app.updater.stop() 
         await self.app.stop()
         await self.app.shutdown()
+        await self.conductor.close()
         await self.bus.close()
+        await self.assistant.close()
         await self.ref.close()
 
-        print('Shutdown complete.')
+        logger.info('Shutdown complete.')
+        if _log_listener:
+            _log_listener.stop() # flushes whatever is still queued
+
+    async def _keep_warm(self):
+        '''
+        Touch the openai api once a minute so a reply after a quiet spell doesn't pay for a new tls handshake.
+        '''
+        client = self.clients['openai']
+        while not self.stop_event.is_set():
+            try:
+                await asyncio.to_thread(client.models.list)
+            except Exception:
+                pass # a failed heartbeat just means the next call connects from scratch
+
+            await asyncio.sleep(60)
 
-    async def _simulate_typing(self, chat_id: str):
+    async def _simulate_typing(self, chat_id: str, state: _Typing):
+        '''
+        Keeps the typing indicator up while state.wanted is set and parks in between.
+        The wait is a timer on state.wake, so toggling typing interrupts it right away.
+        Returns once the chat has been quiet for _TYPING_IDLE seconds.
+        '''
+        loop = asyncio.get_running_loop()
+        parked_at = None
         try:
             while True:
-                await self.app.bot.send_chat_action(chat_id=chat_id, action=ChatAction.TYPING)
-                await asyncio.sleep(4)
+                state.wake.clear()
+
+                if state.wanted.is_set():
+                    parked_at = None
+                    try:
+                        async with self._send_limit:
+                            # typing may have been turned off while waiting for a slot
+                            if state.wanted.is_set():
+                                async with state.sending:
+                                    await self.app.bot.send_chat_action(chat_id=chat_id, action=ChatAction.TYPING)
+                    except Exception:
+                        pass # a missed indicator isn't worth losing the heartbeat over
+                    timer = loop.call_later(_TYPING_INTERVAL, state.wake.set)
+                else:
+                    if parked_at is None:
+                        parked_at = loop.time()
+                    elif loop.time() - parked_at >= _TYPING_IDLE:
+                        return
+                    timer = loop.call_at(parked_at + _TYPING_IDLE, state.wake.set)
+
+                try:
+                    await state.wake.wait()
+                finally:
+                    timer.cancel()
         except asyncio.CancelledError:
             pass
+        finally:
+            if self.typing_tasks.get(chat_id) is state:
+                del self.typing_tasks[chat_id]
 
     def _get_typing(self, chat_id: str):
         def typing():
-            if chat_id not in self.typing_tasks or self.typing_tasks[chat_id].done():
-                self.typing_tasks[chat_id] = asyncio.create_task(self._simulate_typing(chat_id))
+            state = self.typing_tasks.get(chat_id)
+            if state is None or state.task.done():
+                state = self.typing_tasks[chat_id] = _Typing()
+                state.task = asyncio.create_task(self._simulate_typing(chat_id, state))
+
+            if not state.wanted.is_set():
+                state.wanted.set()
+                state.wake.set()
 
         return typing
     
     async def _pop_typing(self, chat_id: str):
-        task = self.typing_tasks.pop(chat_id, None)
-        if task and not task.done():
-            task.cancel()
-            try:
-                await task
-            except asyncio.CancelledError:
+        state = self.typing_tasks.get(chat_id)
+        if state and state.wanted.is_set():
+            state.wanted.clear()
+            state.wake.set()
+            # a chat action already in flight has to land before the reply, or it would show typing after it
+            async with state.sending:
                 pass
 
     async def _handle_message(self, update: Update, context: CallbackContext):
@@ -173,9 +279,6 @@ class Mibo:
         The message is processed by the conductor, 
         which creates a MessageWrapper and sends it to the rest of services.
         '''
-        if update.effective_message.from_user.id == self.app.bot.id:
-            return
-        
         chat_id = str(update.effective_chat.id)
 
         typing = self._get_typing(chat_id)
@@ -223,7 +326,7 @@ class Mibo:
             await self._system_message(chat_id=chat_id, system_message=prompt, **kwargs)
 
         except Exception as e:
-            self.bus.emit(system_events.ErrorEvent(error="Something's wrong with getting prompts.", e=e, tb=None, event_id=None, chat_id=chat_id))
+            await self.bus.emit(system_events.ErrorEvent(error="Something's wrong with getting prompts.", e=e, tb=None, event_id=None, chat_id=chat_id))
 
     async def _parse_message(self, event: assistant_events.AssistantResponse):
         '''
@@ -262,6 +365,7 @@ class Mibo:
                 return
             
             sent_messages = []
+            loop = asyncio.get_running_loop()
 
             # If only text
             if messages and not images:
@@ -272,40 +376,35 @@ class Mibo:
                     if message.reply_id:
                         reply_parameters = ReplyParameters(message_id=message.reply_id, allow_sending_without_reply=True)
 
-                    sent_messages.append(await self.app.bot.send_message(chat_id=chat_id, text=message.message, reply_parameters=reply_parameters))
-
+                    started = loop.time()
+                    async with self._send_limit:
+                        sent_messages.append(await self.app.bot.send_message(chat_id=chat_id, text=message.message, reply_parameters=reply_parameters))
 
+                    # the pause only separates messages, and the send's round-trip already counts towards it
                     if i != (len(messages) - 1):
                         typing()
-
-                    await asyncio.sleep(variables.Variables.typing_delay(message.message) + 0.25) # average of 0.5 for 10 characters and 5 for 100 characters
+                        pause = variables.Variables.typing_delay(message.message) + 0.25 # average of 0.5 for 10 characters and 5 for 100 characters
+                        await asyncio.sleep(max(0.0, started + pause - loop.time()))
                     
             # If only images
             elif images and not messages:
-                media_group = [
-                    self.app.bot._wrap_input_media_photo(image.image_url) for image in images
-                ]
-                sent_messages = await self.app.bot.send_media_group(chat_id=chat_id, media=media_group)
-                sent_messages = [m for m in sent_messages]
+                sent_messages = await self._send_images(chat_id, images)
 
             # If both text and images: send as album, text as caption to first image
             elif images and messages:
-                media_group = []
-                for idx, image in enumerate(images):
-                    caption = messages[0].message if idx == 0 else None
-                    media_group.append(InputMediaPhoto(media=image.image_url, caption=caption))
-                sent_messages = await self.app.bot.send_media_group(chat_id=chat_id, media=media_group)
-                sent_messages = [m for m in sent_messages]
-
-                for i, message in enumerate(messages[1:]):
+                sent_messages = await self._send_images(chat_id, images, caption=messages[0].message)
+
+                for i, message in enumerate(messages[1:], start=1):
                     await self._pop_typing(chat_id)
 
-                    sent_messages.append(await self.app.bot.send_message(chat_id=chat_id, text=message.message))
+                    started = loop.time()
+                    async with self._send_limit:
+                        sent_messages.append(await self.app.bot.send_message(chat_id=chat_id, text=message.message))
 
                     if i != (len(messages) - 1):
                         typing()
-
-                    await asyncio.sleep(variables.Variables.typing_delay(message.message) + 0.25)
+                        pause = variables.Variables.typing_delay(message.message) + 0.25
+                        await asyncio.sleep(max(0.0, started + pause - loop.time()))
 
             await self.bus.emit(mibo_events.TelegramIDUpdateRequest(messages=sent_messages, wrappers=messages + images, chat_id=chat_id))
         
@@ -316,6 +415,30 @@ class Mibo:
         finally:
             await self._pop_typing(chat_id)
 
+    async def _send_images(self, chat_id: str, images: List[wrapper.ImageWrapper], caption: str = None) -> List[Message]:
+        '''
+        Send images in as few requests as possible - albums of up to ten, a lone image as a plain photo.
+        The caption goes on the first image.
+        '''
+        sent_messages = []
+
+        for start in range(0, len(images), 10):
+            chunk = images[start:start + 10]
+            chunk_caption = caption if start == 0 else None
+
+            # telegram rejects albums with fewer than two items
+            if len(chunk) == 1:
+                async with self._send_limit:
+                    sent_messages.append(await self.app.bot.send_photo(chat_id=chat_id, photo=chunk[0].image_bytes, caption=chunk_caption))
+                continue
+
+            media_group = [InputMediaPhoto(media=chunk[0].image_bytes, caption=chunk_caption)]
+            media_group += [InputMediaPhoto(media=image.image_bytes) for image in chunk[1:]]
+            async with self._send_limit:
+                sent_messages.extend(await self.app.bot.send_media_group(chat_id=chat_id, media=media_group))
+
+        return sent_messages
+
     async def _generate_image(self, update: Update, context: CallbackContext):
         pass
 
@@ -352,28 +475,30 @@ class Mibo:
         Sends a message to the group when the bot joins or leaves.
         '''
         chat = update.effective_chat
-        old_status = update.my_chat_member.old_chat_member.status
-        new_status = update.my_chat_member.new_chat_member.status
-        group_name = chat.effective_name
+        if chat.type not in _GROUP_TYPES:
+            return
 
-        update_datetime = update.my_chat_member.date
-        if update_datetime < self.start_datetime:
+        chat_member = update.my_chat_member
+        if chat_member.date < self.start_datetime:
             return
 
-        if chat.type in [Chat.GROUP, Chat.SUPERGROUP]:
-            if old_status in [ChatMember.LEFT, ChatMember.BANNED] and new_status in [ChatMember.MEMBER, ChatMember.ADMINISTRATOR]:
-                is_admin = (new_status == ChatMember.ADMINISTRATOR)
+        old_status = chat_member.old_chat_member.status
+        new_status = chat_member.new_chat_member.status
+        group_name = chat.effective_name
+
+        if old_status in _LEFT_STATUSES and new_status in _JOINED_STATUSES:
+            is_admin = (new_status == ChatMember.ADMINISTRATOR)
 
-                admin_replacer = 'an admin' if is_admin else 'a member'
-                replacers = {
-                    'admin': admin_replacer,
-                    'group_name': group_name
-                }
+            admin_replacer = 'an admin' if is_admin else 'a member'
+            replacers = {
+                'admin': admin_replacer,
+                'group_name': group_name
+            }
 
-                await self._event_message(chat_id=str(chat.id), event_prompt=prompt_enum.WelcomePrompt, replacers=replacers, chat_name=group_name)
+            await self._event_message(chat_id=str(chat.id), event_prompt=prompt_enum.WelcomePrompt, replacers=replacers, chat_name=group_name)
 
-            elif old_status in [ChatMember.MEMBER, ChatMember.ADMINISTRATOR] and new_status in [ChatMember.LEFT, ChatMember.BANNED]:
-                pass    
+        elif old_status in _JOINED_STATUSES and new_status in _LEFT_STATUSES:
+            pass    
 
     async def _debug(self, update: Update, context: CallbackContext):
         '''
@@ -394,6 +519,8 @@ class Mibo:
         if chat.type == Chat.PRIVATE:
             token = await self.ref.generate_token(str(user.id), str(user.username or user.id))
 
+            # escaped up front, a parse error would otherwise cost a failed request
+            token = escape_markdown(token, version=2, entity_type='code')
             await context.bot.send_message(chat.id, f'Your token is: `{token}`', parse_mode='MarkdownV2')
 
             # await self._event_message(chat_id=str(chat.id), event_prompt=prompt_enum.TokenPrompt, replacers={})
@@ -406,7 +533,7 @@ class Mibo:
 
     async def _handle_exception(self, event: system_events.ErrorEvent) -> None:
         '''
-        Print exception logs.
+        Log exceptions.
         '''
         error = event.error
         e = event.e
@@ -418,18 +545,35 @@ class Mibo:
         if chat_id and typing:
             await self._pop_typing(chat_id)
 
-        print(f"{error}")
-
         if tb:
-            traceback.print_exception(type(e), e, tb)
+            logger.error(error, exc_info=(type(e), e, tb))
+        else:
+            logger.error(error)
+
+_log_listener: logging.handlers.QueueListener = None
 
-logging.basicConfig(
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    level=logging.CRITICAL
-)
-logging.getLogger("telegram.ext").setLevel(logging.CRITICAL)
+def _setup_logging():
+    '''
+    Configure logging when the bot is actually started, not when the module is imported.
+    '''
+    global _log_listener
+
+    # records are only queued on the loop; a background thread does the actual writing
+    log_queue = queue.SimpleQueue()
+    _log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+
+    logging.basicConfig(
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        level=logging.CRITICAL,
+        handlers=[logging.handlers.QueueHandler(log_queue)]
+    )
+    logging.getLogger("telegram.ext").setLevel(logging.CRITICAL)
+    logger.setLevel(logging.INFO)
+    _log_listener.start()
 
 async def main() -> None:
+    _setup_logging()
+
     token = variables.Variables.TELEGRAM_KEY
     db_path = variables.Variables.DB_PATH
 
@@ -437,4 +581,7 @@ async def main() -> None:
     await bot.run()
 
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    if uvloop:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -1,11 +1,32 @@
+import functools
 import tiktoken
 
+from typing import List
+
 class Tokenizer:
     def __init__(self):
         pass
 
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def encoding(model: str = 'gpt-4o') -> tiktoken.Encoding:
+        '''
+        Get the tiktoken encoding for a model, loaded once per model.
+        '''
+        return tiktoken.encoding_for_model(model)
+
     @staticmethod
     def gpt(text: str, model: str = 'gpt-4o'):
-        encoding = tiktoken.encoding_for_model(model)
+        encoding = Tokenizer.encoding(model)
         tokens = len(encoding.encode(text))
-        return tokens
\ No newline at end of file
+        return tokens
+
+    @staticmethod
+    def gpt_batch(texts: List[str], model: str = 'gpt-4o') -> List[int]:
+        '''
+        Count tokens for many texts with a single encoder call.
+        '''
+        if not texts:
+            return []
+        encoding = Tokenizer.encoding(model)
+        return [len(tokens) for tokens in encoding.encode_ordinary_batch(texts)]
\ No newline at end of file
@@ -43,6 +43,9 @@ class Variables:
         CHAT_TTL = os.environ.get('CHAT_TTL', 3600) # time it takes for a chat to unload from memory, in minutes
         CHAT_TTL = int(CHAT_TTL)
 
+        MAX_WINDOWS = os.environ.get('MAX_WINDOWS', 512) # how many chat windows are kept in memory, least recently used go first
+        MAX_WINDOWS = int(MAX_WINDOWS)
+
         MFA_TOKEN_EXPIRY = os.environ.get('MFA_TOKEN_EXPIRY', 2) # how long the admin panel token expires, in minutes
         MFA_TOKEN_EXPIRY = int(MFA_TOKEN_EXPIRY)
 
@@ -50,6 +53,7 @@ class Variables:
         JWT_EXPIRE_MINUTES = int(JWT_EXPIRE_MINUTES)
     except ValueError:
         CHAT_TTL = 3600
+        MAX_WINDOWS = 512
         MFA_TOKEN_EXPIRY = 2
         JWT_EXPIRE_MINUTES = 180
 